@@ -3,11 +3,20 @@ Automatic Data Organization Script
 Organizes images based on filename prefixes:
 - O_* = ORGANIC
 - R_* = NONORGANIC
+
+Run with --ingest for large batches: a single directory scan, parallel
+transfers, hardlink/reflink instead of copies, content-hash dedup against
+the dataset index and a resumable manifest.
 """
 
 import os
+import json
 import shutil
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_index import CATEGORIES, scan_images, describe_image, open_index, scan_dataset
 
 # Configuration
 BASE_DIR = Path(__file__).parent
@@ -15,6 +24,23 @@ DATA_DIR = BASE_DIR / 'Data'
 TEST_IMAGES_DIR = BASE_DIR / 'test images'
 ORGANIC_DIR = DATA_DIR / 'ORGANIC'
 NONORGANIC_DIR = DATA_DIR / 'NONORGANIC'
+MANIFEST_PATH = DATA_DIR / '.ingest_manifest.jsonl'
+
+LINK_MODES = ('copy', 'hardlink', 'reflink')
+
+# Linux FICLONE ioctl (_IOW(0x94, 9, int)) used for copy-on-write clones
+FICLONE = 0x40049409
+
+
+def category_dir_for(filename):
+    """Return the destination folder for a filename prefix, or None if unknown"""
+    if filename.startswith('O_'):
+        return ORGANIC_DIR
+    if filename.startswith('R_'):
+        # Non-Organic (Recyclable)
+        return NONORGANIC_DIR
+    return None
+
 
 def create_folders():
     """Create the Data folder structure"""
@@ -38,10 +64,7 @@ def organize_images():
         return False
     
     # Get all image files
-    image_files = list(TEST_IMAGES_DIR.glob('*.jpg')) + \
-                  list(TEST_IMAGES_DIR.glob('*.png')) + \
-                  list(TEST_IMAGES_DIR.glob('*.jpeg')) + \
-                  list(TEST_IMAGES_DIR.glob('*.bmp'))
+    image_files = [Path(entry.path) for entry in scan_images(TEST_IMAGES_DIR)]
     
     if not image_files:
         print("ERROR: No images found in test images folder!")
@@ -96,9 +119,311 @@ def organize_images():
         print("WARNING: Need images in both categories for training!")
         return False
 
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """
+    Load the ingest manifest
+    
+    The manifest is append-only JSON lines; later lines win, so a file that
+    was re-ingested keeps its latest record.
+    
+    Args:
+        manifest_path: Path to the manifest file
+        
+    Returns:
+        dict: Manifest records keyed by absolute source path
+    """
+    records = {}
+    if not Path(manifest_path).exists():
+        return records
+    
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Truncated last line from an interrupted run
+                continue
+            records[record['path']] = record
+    return records
+
+
+def _make_record(path, row, status, dest):
+    return {
+        'path': str(path),
+        'size': row['size'],
+        'mtime_ns': row['mtime_ns'],
+        'sha256': row['sha256'],
+        'status': status,
+        'dest': str(dest)
+    }
+
+
+def _is_current(record, row):
+    """Check that a manifest record still describes the indexed source file"""
+    return record is not None and \
+           record['size'] == row['size'] and \
+           record['mtime_ns'] == row['mtime_ns']
+
+
+def _reflink(source, destination):
+    import fcntl  # Not available on Windows; caller falls back to a copy
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source, destination)
+
+
+def transfer_file(source, destination, mode='copy'):
+    """
+    Place a file at destination by copy, hardlink or reflink
+    
+    Writes to a temporary name and renames into place, so an interrupted
+    run never leaves a half-written image in the Data folder. Hardlinks and
+    reflinks fall back to a plain copy when the filesystem refuses them
+    (e.g. across devices).
+    
+    Args:
+        source: Source file path
+        destination: Destination file path
+        mode: One of LINK_MODES
+        
+    Returns:
+        str: Transfer mode actually used
+    """
+    destination = Path(destination)
+    tmp_path = destination.with_name(f'.{destination.name}.part')
+    if tmp_path.exists():
+        tmp_path.unlink()
+    
+    used_mode = mode
+    try:
+        if mode == 'hardlink':
+            os.link(source, tmp_path)
+        elif mode == 'reflink':
+            _reflink(source, tmp_path)
+        else:
+            shutil.copy2(source, tmp_path)
+    except (OSError, ImportError):
+        if mode == 'copy':
+            raise
+        if tmp_path.exists():
+            tmp_path.unlink()
+        shutil.copy2(source, tmp_path)
+        used_mode = 'copy'
+    
+    os.replace(tmp_path, destination)
+    return used_mode
+
+
+def _describe_source(path):
+    try:
+        return describe_image(path)
+    except OSError as e:
+        return e
+
+
+def _transfer_job(source, destination, mode):
+    used_mode = transfer_file(source, destination, mode)
+    return used_mode, os.stat(destination)
+
+
+def _unique_destination(dest_dir, filename, sha256, taken):
+    """Pick a destination path that does not clobber a different image"""
+    dest = dest_dir / filename
+    if dest not in taken:
+        return dest
+    stem, suffix = os.path.splitext(filename)
+    return dest_dir / f'{stem}_{sha256[:8]}{suffix}'
+
+
+def ingest_images(source_dir=TEST_IMAGES_DIR, mode='copy', workers=None,
+                  manifest_path=MANIFEST_PATH):
+    """
+    Bulk-ingest images into the Data folders
+    
+    Updates the dataset index for Data/ORGANIC and Data/NONORGANIC
+    (hashing only new or changed files), hashes the source images not yet
+    ingested, skips any whose content is already in the dataset and
+    transfers the rest on a thread pool. Every finished file is appended to the manifest, so
+    rerunning after an interruption only processes what is left.
+    
+    Args:
+        source_dir: Folder with O_* / R_* prefixed images
+        mode: How to place files: 'copy', 'hardlink' or 'reflink'
+        workers: Thread pool size (default: min(32, cpu_count + 4))
+        manifest_path: Path to the resumable ingest manifest
+        
+    Returns:
+        bool: True if both categories have images afterwards
+    """
+    print("=" * 60)
+    print("Bulk Image Ingest")
+    print("=" * 60)
+    print()
+    
+    if mode not in LINK_MODES:
+        raise ValueError(f"Unknown transfer mode: {mode}. Choose from: {', '.join(LINK_MODES)}")
+    
+    create_folders()
+    
+    source_dir = Path(source_dir)
+    if not source_dir.exists():
+        print(f"ERROR: Source folder not found: {source_dir}")
+        return False
+    
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) + 4)
+    
+    manifest = load_manifest(manifest_path)
+    
+    with open_index(DATA_DIR) as index, \
+            ThreadPoolExecutor(max_workers=workers) as pool, \
+            open(manifest_path, 'a', encoding='utf-8') as manifest_file:
+        
+        def record(entry):
+            manifest[entry['path']] = entry
+            manifest_file.write(json.dumps(entry) + '\n')
+            manifest_file.flush()
+        
+        # Only new or changed files get hashed here
+        scan_dataset(index, DATA_DIR)
+        stored = [row for row in index.files() if row['label'] in CATEGORIES]
+        known_hashes = {row['sha256']: index.resolve(row['path']) for row in stored}
+        taken = {index.resolve(row['path']) for row in stored}
+        print(f"Indexed {len(stored)} images already in {DATA_DIR}")
+        
+        # Source folders are hashed but kept out of the Data index
+        counts = {'resumed': 0, 'duplicate': 0, 'cross_category': 0, 'unknown': 0,
+                  'fallback': 0, 'failed': 0}
+        pending = []
+        for entry in scan_images(source_dir.resolve()):
+            path = Path(entry.path)
+            dest_dir = category_dir_for(path.name)
+            if dest_dir is None:
+                print(f"WARNING: Unknown prefix for: {path.name}")
+                counts['unknown'] += 1
+                continue
+            try:
+                stat = entry.stat()
+            except OSError as e:
+                print(f"WARNING: Cannot read {path.name}: {e}")
+                counts['failed'] += 1
+                continue
+            row = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            if _is_current(manifest.get(str(path)), row):
+                counts['resumed'] += 1
+                continue
+            pending.append((path, row, dest_dir))
+        
+        described = pool.map(_describe_source, [path for path, _, _ in pending])
+        
+        # Dedup serially so two identical sources in one batch are caught
+        ingested = {category: 0 for category in CATEGORIES}
+        futures = []
+        for (path, row, dest_dir), info in zip(pending, described):
+            # Unreadable or vanished sources are skipped; the next run retries them
+            if isinstance(info, OSError):
+                print(f"WARNING: Cannot read {path.name}: {info}")
+                counts['failed'] += 1
+                continue
+            sha256, width, height, fmt = info
+            row.update(sha256=sha256, width=width, height=height, format=fmt)
+            
+            dest_dir = dest_dir.resolve()
+            duplicate_of = known_hashes.get(row['sha256'])
+            if duplicate_of is not None:
+                counts['duplicate'] += 1
+                if duplicate_of.parent != dest_dir:
+                    counts['cross_category'] += 1
+                    print(f"WARNING: {path.name} duplicates {duplicate_of.parent.name}/{duplicate_of.name}")
+                record(_make_record(path, row, 'duplicate', duplicate_of))
+                continue
+            
+            dest = _unique_destination(dest_dir, path.name, row['sha256'], taken)
+            known_hashes[row['sha256']] = dest
+            taken.add(dest)
+            futures.append((path, row, dest, pool.submit(_transfer_job, path, dest, mode)))
+        
+        print(f"Found {len(futures)} new images to ingest ({counts['resumed']} already done)")
+        print()
+        
+        for path, row, dest, future in futures:
+            try:
+                used_mode, dest_stat = future.result()
+            except Exception as e:
+                print(f"Error ingesting {path.name}: {e}")
+                counts['failed'] += 1
+                continue
+            if used_mode != mode:
+                counts['fallback'] += 1
+            label = dest.parent.name
+            ingested[label] += 1
+            index.add(dest, label, dest_stat, row['sha256'],
+                      row['width'], row['height'], row['format'])
+            record(_make_record(path, row, 'ingested', dest))
+        
+        index.commit()
+        totals = index.class_counts()
+    
+    organic_total = totals.get('ORGANIC', 0)
+    nonorganic_total = totals.get('NONORGANIC', 0)
+    
+    # Summary
+    print("=" * 60)
+    print("Ingest Complete!")
+    print("=" * 60)
+    print(f"ORGANIC: {ingested['ORGANIC']} new ({organic_total} total)")
+    print(f"NONORGANIC: {ingested['NONORGANIC']} new ({nonorganic_total} total)")
+    print(f"Duplicates skipped: {counts['duplicate']}")
+    if counts['cross_category'] > 0:
+        print(f"WARNING: {counts['cross_category']} duplicates already exist in the other category")
+    if counts['resumed'] > 0:
+        print(f"Already ingested by a previous run: {counts['resumed']}")
+    if counts['unknown'] > 0:
+        print(f"WARNING: {counts['unknown']} images with unknown prefix (not organized)")
+    if counts['failed'] > 0:
+        print(f"WARNING: {counts['failed']} images could not be ingested (retried on the next run)")
+    if counts['fallback'] > 0:
+        print(f"NOTE: {counts['fallback']} files were copied because {mode} was not supported")
+    print(f"Manifest: {manifest_path}")
+    print()
+    
+    if organic_total > 0 and nonorganic_total > 0:
+        print("SUCCESS: Data is ready for training!")
+        return True
+    else:
+        print("WARNING: Need images in both categories for training!")
+        return False
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Organize images into Data/ORGANIC and Data/NONORGANIC by filename prefix'
+    )
+    parser.add_argument('--ingest', action='store_true',
+                        help='Bulk ingest mode: parallel, deduplicated and resumable')
+    parser.add_argument('--source', default=str(TEST_IMAGES_DIR),
+                        help='Folder to ingest from (default: test images)')
+    parser.add_argument('--mode', choices=LINK_MODES, default='copy',
+                        help='How to place files in Data (default: copy)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker threads')
+    parser.add_argument('--manifest', default=str(MANIFEST_PATH),
+                        help='Resumable ingest manifest path')
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
+    args = parse_args()
     try:
-        success = organize_images()
+        if args.ingest:
+            success = ingest_images(args.source, args.mode, args.workers, args.manifest)
+        else:
+            success = organize_images()
         if success:
             print("\nAll done! You can now train your model.")
         else:
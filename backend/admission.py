@@ -0,0 +1,264 @@
+"""
+Request admission control for upload endpoints
+Rejects oversized, undecodable or excess requests before the upload body
+is buffered, so a burst of large uploads can't starve the inference path.
+"""
+
+import io
+import re
+import logging
+import threading
+from collections import namedtuple
+
+from utils import sniff_image_header, IMAGE_SIGNATURE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Canonical format names reported by sniff_image_header
+_FORMAT_EXTENSIONS = {'jpg': 'jpeg', 'jpeg': 'jpeg', 'png': 'png', 'gif': 'gif', 'bmp': 'bmp'}
+
+Rejection = namedtuple('Rejection', ['status', 'error', 'message', 'retry_after'])
+
+
+class PrefixedStream(io.RawIOBase):
+    """Replays already-read bytes before continuing with the original stream"""
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def read(self, size=-1):
+        if self._prefix:
+            if size is None or size < 0:
+                data, self._prefix = self._prefix + self._stream.read(), b''
+                return data
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            return data
+        return self._stream.read(size)
+
+    def readline(self, size=-1):
+        if self._prefix:
+            end = self._prefix.find(b'\n') + 1 or len(self._prefix)
+            if size is not None and 0 <= size < end:
+                end = size
+            data, self._prefix = self._prefix[:end], self._prefix[end:]
+            return data
+        return self._stream.readline(size)
+
+
+def peek_body(environ, size):
+    """
+    Read the first bytes of the request body without consuming them
+
+    The WSGI input stream is replaced so that the body parser later sees
+    the complete, unmodified body.
+
+    Args:
+        environ: WSGI environ
+        size: Maximum number of bytes to read (capped at Content-Length)
+
+    Returns:
+        bytes: Leading bytes of the body
+    """
+    content_length = int(environ.get('CONTENT_LENGTH') or 0)
+    to_read = min(size, content_length)
+    stream = environ['wsgi.input']
+
+    chunks = []
+    while to_read > 0:
+        chunk = stream.read(to_read)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        to_read -= len(chunk)
+
+    head = b''.join(chunks)
+    environ['wsgi.input'] = PrefixedStream(head, stream)
+    return head
+
+
+def multipart_field_head(head, boundary, field):
+    """
+    Find the start of a file field's content in a multipart body prefix
+
+    Args:
+        head: Leading bytes of a multipart/form-data body
+        boundary: Multipart boundary from the Content-Type header
+        field: Form field name
+
+    Returns:
+        bytes: Leading bytes of the field's content, or None if the field
+        does not start within head
+    """
+    delimiter = b'--' + boundary.encode('latin-1')
+    # name= only at a parameter boundary, so filename="image" doesn't match
+    name = re.compile(rb'(?:^|;)\s*name="' + re.escape(field.encode('latin-1')) + rb'"', re.IGNORECASE)
+    for part in head.split(delimiter)[1:]:
+        header_end = part.find(b'\r\n\r\n')
+        if header_end == -1:
+            return None
+        for line in part[:header_end].split(b'\r\n'):
+            header, _, value = line.partition(b':')
+            if header.strip().lower() == b'content-disposition' and name.search(value):
+                return part[header_end + 4:]
+    return None
+
+
+class AdmissionController:
+    """Per-worker in-flight limits and early upload checks"""
+
+    def __init__(self, max_content_length, max_inflight, max_inflight_large,
+                 large_upload_size, header_peek_size, max_image_pixels,
+                 allowed_extensions, retry_after=1):
+        """
+        Initialize AdmissionController
+
+        Args:
+            max_content_length: Largest request body accepted, in bytes
+            max_inflight: Requests this worker processes concurrently
+            max_inflight_large: Concurrent requests larger than large_upload_size
+            large_upload_size: Body size from which a request counts as large
+            header_peek_size: Bytes read from the body to sniff the image header
+            max_image_pixels: Largest image (width * height) accepted
+            allowed_extensions: Allowed file extensions
+            retry_after: Seconds suggested to rejected clients
+        """
+        self.max_content_length = max_content_length
+        self.max_inflight = max_inflight
+        self.large_upload_size = large_upload_size
+        self.header_peek_size = header_peek_size
+        self.max_image_pixels = max_image_pixels
+        self.allowed_formats = {
+            _FORMAT_EXTENSIONS[ext] for ext in allowed_extensions if ext in _FORMAT_EXTENSIONS
+        }
+        self.retry_after = retry_after
+
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+        self._inflight_large = threading.BoundedSemaphore(max_inflight_large)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.rejected = 0
+
+    def admit(self, environ, field='image'):
+        """
+        Decide whether to accept a request, before its body is buffered
+
+        Checks Content-Length, takes in-flight slots and, for multipart
+        uploads, sniffs the image header from the first bytes of the body.
+
+        Args:
+            environ: WSGI environ of the request
+            field: Form field holding the image
+
+        Returns:
+            tuple: (slots, rejection); pass slots to release() when the
+            request finishes. rejection is None if the request is admitted.
+        """
+        content_length = environ.get('CONTENT_LENGTH')
+        if content_length is None or content_length == '':
+            return (), self._reject(411, 'Length required',
+                                    'Uploads must send a Content-Length header')
+
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            return (), self._reject(400, 'Invalid request', 'Malformed Content-Length header')
+        if content_length > self.max_content_length:
+            return (), self._reject(413, 'File too large',
+                                    f'Maximum size: {self.max_content_length / (1024*1024):.1f}MB')
+
+        slots = []
+        if not self._inflight.acquire(blocking=False):
+            return (), self._reject(503, 'Server busy',
+                                    'Too many requests in progress. Please retry.',
+                                    self.retry_after)
+        slots.append(self._inflight)
+        with self._lock:
+            self.active += 1
+
+        # Slots aren't in g yet, so teardown can't free them if reading fails
+        try:
+            if content_length >= self.large_upload_size:
+                if not self._inflight_large.acquire(blocking=False):
+                    self.release(slots)
+                    return (), self._reject(429, 'Too many large uploads',
+                                            'Too many large uploads in progress. '
+                                            'Please retry or send a smaller image.',
+                                            self.retry_after)
+                slots.append(self._inflight_large)
+
+            rejection = self._check_image_header(environ, field)
+        except Exception:
+            self.release(slots)
+            raise
+        if rejection is not None:
+            self.release(slots)
+            return (), rejection
+
+        return slots, None
+
+    def release(self, slots):
+        """Return in-flight slots taken by admit()"""
+        if not slots:
+            return
+        for slot in slots:
+            slot.release()
+        with self._lock:
+            self.active -= 1
+
+    def get_status(self):
+        """
+        Get admission status information
+
+        Returns:
+            dict: Current and maximum in-flight requests, rejections so far
+        """
+        return {
+            'inflight': self.active,
+            'max_inflight': self.max_inflight,
+            'rejected': self.rejected
+        }
+
+    def _reject(self, status, error, message, retry_after=None):
+        with self._lock:
+            self.rejected += 1
+        return Rejection(status, error, message, retry_after)
+
+    def _check_image_header(self, environ, field):
+        content_type = environ.get('CONTENT_TYPE', '')
+        if not content_type.startswith('multipart/form-data'):
+            return None
+
+        boundary = None
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'boundary':
+                boundary = value.strip('"')
+        if not boundary:
+            return None
+
+        data = multipart_field_head(peek_body(environ, self.header_peek_size), boundary, field)
+        if data is None or len(data) < IMAGE_SIGNATURE_SIZE:
+            # Field starts past (or too close to the end of) the peeked
+            # bytes; full validation happens later
+            return None
+
+        header = sniff_image_header(data)
+        if header is None or header[0] not in self.allowed_formats:
+            return self._reject(415, 'Invalid file',
+                                'File is not a supported image (PNG, JPEG, GIF or BMP)')
+
+        fmt, width, height = header
+        if width is not None and width * height > self.max_image_pixels:
+            return self._reject(413, 'Image too large',
+                                f'{width}x{height} exceeds the {self.max_image_pixels} pixel limit')
+
+        return None
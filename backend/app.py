@@ -3,20 +3,27 @@ Flask Backend API for Waste Classification
 Serves the ML model for organic/non-organic waste classification
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import os
+import time
+import uuid
 import logging
 from pathlib import Path
 
 from config import (
-    FLASK_HOST, FLASK_PORT, FLASK_DEBUG,
+    FLASK_HOST, FLASK_PORT, FLASK_DEBUG, FLASK_THREADED, FLASK_PROCESSES,
     UPLOAD_FOLDER, ALLOWED_EXTENSIONS, MAX_FILE_SIZE,
-    MODEL_PATH, CATEGORIES, CORS_ORIGINS, LOG_LEVEL
+    MAX_INFLIGHT_REQUESTS, MAX_INFLIGHT_LARGE_UPLOADS, LARGE_UPLOAD_SIZE,
+    HEADER_PEEK_SIZE, MAX_IMAGE_PIXELS, RETRY_AFTER_SECONDS,
+    MODEL_PATH, EVAL_REPORT_PATH, CATEGORIES, CORS_ORIGINS, LOG_LEVEL,
+    IMAGE_SHAPE, RAW_TENSOR_MIMETYPE, TENSOR_BATCH_MIMETYPE, BINARY_RESPONSE_MIMETYPE
 )
 from model_loader import ModelLoader
+from admission import AdmissionController
 from utils import (
-    validate_image_file, preprocess_image, ensure_directory
+    validate_image_file, preprocess_image, ensure_directory,
+    decode_tensor_payload, tensor_to_features, encode_binary_predictions
 )
 
 # Configure logging
@@ -40,7 +47,75 @@ ensure_directory(UPLOAD_FOLDER)
 ensure_directory(MODEL_PATH.parent)
 
 # Initialize model loader
-model_loader = ModelLoader(MODEL_PATH)
+model_loader = ModelLoader(MODEL_PATH, EVAL_REPORT_PATH)
+
+# Admission control for upload endpoints (limits are per worker process)
+admission = AdmissionController(
+    MAX_FILE_SIZE, MAX_INFLIGHT_REQUESTS, MAX_INFLIGHT_LARGE_UPLOADS,
+    LARGE_UPLOAD_SIZE, HEADER_PEEK_SIZE, MAX_IMAGE_PIXELS,
+    ALLOWED_EXTENSIONS, RETRY_AFTER_SECONDS
+)
+ADMISSION_ENDPOINTS = {'predict'}
+
+
+def record_stage(name, start):
+    """
+    Record how long a request stage took, for the Server-Timing header
+    
+    Args:
+        name: Stage name
+        start: time.perf_counter() value when the stage started
+        
+    Returns:
+        float: time.perf_counter() now, to start the next stage
+    """
+    now = time.perf_counter()
+    g.setdefault('stage_timings', []).append((name, (now - start) * 1000))
+    return now
+
+
+@app.before_request
+def admit_request():
+    """Reject uploads early, before Werkzeug buffers the request body"""
+    if request.endpoint not in ADMISSION_ENDPOINTS or request.method != 'POST':
+        return None
+    
+    g.request_start = time.perf_counter()
+    slots, rejection = admission.admit(request.environ)
+    record_stage('admit', g.request_start)
+    if rejection is not None:
+        response = jsonify({
+            'error': rejection.error,
+            'message': rejection.message
+        })
+        response.status_code = rejection.status
+        if rejection.retry_after is not None:
+            response.headers['Retry-After'] = str(rejection.retry_after)
+        # The body was not read; don't try to reuse the connection
+        response.headers['Connection'] = 'close'
+        return response
+    
+    g.admission_slots = slots
+    return None
+
+
+@app.after_request
+def add_server_timing(response):
+    """Expose per-stage timings (ms) so load tests can see where time goes"""
+    timings = g.get('stage_timings')
+    if timings:
+        timings = timings + [('total', (time.perf_counter() - g.request_start) * 1000)]
+        response.headers['Server-Timing'] = ', '.join(
+            f'{name};dur={duration:.3f}' for name, duration in timings
+        )
+    return response
+
+
+@app.teardown_request
+def release_admission(exc):
+    """Free in-flight slots taken by admit_request"""
+    admission.release(g.pop('admission_slots', None))
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -48,15 +123,90 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'model_loaded': model_loader.is_loaded,
+        'admission': admission.get_status(),
         'service': 'Waste Classification API'
     }), 200
 
 
+TENSOR_MIMETYPES = {RAW_TENSOR_MIMETYPE, TENSOR_BATCH_MIMETYPE}
+
+
+def format_prediction(prediction, probabilities):
+    """Build the JSON result for one image"""
+    prediction = int(prediction)
+    return {
+        'prediction': CATEGORIES[prediction],
+        'confidence': round(float(probabilities[prediction]) * 100, 2),
+        'probabilities': {
+            'ORGANIC': round(float(probabilities[0]) * 100, 2),
+            'NONORGANIC': round(float(probabilities[1]) * 100, 2)
+        }
+    }
+
+
+def predict_tensor():
+    """Predict from pre-resized uint8 tensors (one raw image or a framed batch)"""
+    if not model_loader.is_loaded:
+        return jsonify({
+            'error': 'Model not loaded',
+            'message': 'ML model is not available. Please train the model first.'
+        }), 503
+    
+    # Wrapped in place: no decode, resize or copy of the upload
+    start = time.perf_counter()
+    try:
+        images = decode_tensor_payload(
+            request.get_data(cache=False), IMAGE_SHAPE,
+            framed=request.mimetype == TENSOR_BATCH_MIMETYPE
+        )
+    except ValueError as e:
+        return jsonify({
+            'error': 'Invalid tensor',
+            'message': str(e)
+        }), 400
+    
+    start = record_stage('upload', start)
+    
+    features = tensor_to_features(images)
+    start = record_stage('preprocess', start)
+    if model_loader.n_features is not None and features.shape[1] != model_loader.n_features:
+        return jsonify({
+            'error': 'Invalid tensor',
+            'message': f'Model expects {model_loader.n_features} features, got {features.shape[1]}'
+        }), 400
+    
+    predictions, probabilities = model_loader.predict_batch(features)
+    record_stage('predict', start)
+    
+    # Honour q-values; JSON wins ties and */*
+    best = request.accept_mimetypes.best_match(['application/json', BINARY_RESPONSE_MIMETYPE])
+    if best == BINARY_RESPONSE_MIMETYPE:
+        return Response(encode_binary_predictions(predictions, probabilities),
+                        mimetype=BINARY_RESPONSE_MIMETYPE)
+    
+    if request.mimetype == RAW_TENSOR_MIMETYPE:
+        return jsonify({
+            'success': True,
+            **format_prediction(predictions[0], probabilities[0])
+        }), 200
+    
+    return jsonify({
+        'success': True,
+        'count': len(predictions),
+        'predictions': [format_prediction(*result) for result in zip(predictions, probabilities)]
+    }), 200
+
+
 @app.route('/api/predict', methods=['POST'])
 def predict():
-    """Predict waste classification from uploaded image"""
+    """Predict waste classification from uploaded image or tensor"""
     filepath = None
     try:
+        if request.mimetype in TENSOR_MIMETYPES:
+            return predict_tensor()
+        
+        start = time.perf_counter()
+        
         # Check if file is present
         if 'image' not in request.files:
             return jsonify({
@@ -84,21 +234,21 @@ def predict():
                 'message': 'ML model is not available. Please train the model first.'
             }), 503
         
-        # Save uploaded file temporarily
+        # Save uploaded file temporarily (unique name: concurrent uploads
+        # of the same file must not clobber each other)
         from werkzeug.utils import secure_filename
-        filename = secure_filename(file.filename)
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
         filepath = Path(app.config['UPLOAD_FOLDER']) / filename
         file.save(filepath)
+        start = record_stage('upload', start)
         
         # Preprocess image
         processed_image = preprocess_image(str(filepath))
+        start = record_stage('preprocess', start)
         
         # Make prediction
         prediction, probabilities = model_loader.predict(processed_image)
-        
-        # Get category
-        category = CATEGORIES[prediction]
-        confidence = float(probabilities[prediction]) * 100
+        record_stage('predict', start)
         
         # Clean up uploaded file
         try:
@@ -109,12 +259,7 @@ def predict():
         
         return jsonify({
             'success': True,
-            'prediction': category,
-            'confidence': round(confidence, 2),
-            'probabilities': {
-                'ORGANIC': round(float(probabilities[0]) * 100, 2),
-                'NONORGANIC': round(float(probabilities[1]) * 100, 2)
-            }
+            **format_prediction(prediction, probabilities)
         }), 200
         
     except Exception as e:
@@ -152,4 +297,5 @@ if __name__ == '__main__':
         logger.warning("Model could not be loaded. API will run but predictions will fail.")
     
     # Run the Flask app
-    app.run(debug=FLASK_DEBUG, host=FLASK_HOST, port=FLASK_PORT)
+    app.run(debug=FLASK_DEBUG, host=FLASK_HOST, port=FLASK_PORT,
+            threaded=FLASK_THREADED, processes=FLASK_PROCESSES)
@@ -12,20 +12,40 @@ BASE_DIR = Path(__file__).parent
 FLASK_HOST = os.getenv('FLASK_HOST', '0.0.0.0')
 FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
 FLASK_DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+# Development server concurrency: threads, or forked processes (not both)
+FLASK_THREADED = os.getenv('FLASK_THREADED', 'True').lower() == 'true'
+FLASK_PROCESSES = int(os.getenv('FLASK_PROCESSES', 1))
 
 # File Upload Configuration
 UPLOAD_FOLDER = BASE_DIR / 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
+# Admission Control (per worker process)
+MAX_INFLIGHT_REQUESTS = int(os.getenv('MAX_INFLIGHT_REQUESTS', 8))
+MAX_INFLIGHT_LARGE_UPLOADS = int(os.getenv('MAX_INFLIGHT_LARGE_UPLOADS', 2))
+LARGE_UPLOAD_SIZE = 2 * 1024 * 1024  # 2MB
+HEADER_PEEK_SIZE = 16 * 1024  # Bytes read to sniff the image header
+MAX_IMAGE_PIXELS = 40 * 1000 * 1000  # Reject larger images before decoding
+RETRY_AFTER_SECONDS = 1
+
 # Model Configuration
 MODEL_FOLDER = BASE_DIR / 'models'
 MODEL_FILENAME = 'RF_Classifier.pkl'
 MODEL_PATH = MODEL_FOLDER / MODEL_FILENAME
+EVAL_REPORT_PATH = MODEL_FOLDER / 'evaluation_report.json'
 
 # Categories
 CATEGORIES = {0: 'ORGANIC', 1: 'NONORGANIC'}
 
+# Model input: images are resized to this shape and flattened
+IMAGE_SHAPE = (150, 150, 3)
+
+# Pre-resized tensor uploads (edge clients)
+RAW_TENSOR_MIMETYPE = 'application/octet-stream'  # One raw 150x150x3 uint8 image
+TENSOR_BATCH_MIMETYPE = 'application/x-waste-tensor-batch'  # Framed batch, see utils
+BINARY_RESPONSE_MIMETYPE = 'application/x-waste-prediction'  # Compact binary response
+
 # CORS Configuration
 CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
 
@@ -0,0 +1,298 @@
+"""
+Evaluate the Waste Classification Model
+Runs inference over a test set in bounded chunks on a process pool and
+writes a JSON report (per-class precision/recall, calibration curves and
+per-image latency) next to the model, where /api/model/status serves it.
+
+Two latencies are reported: 'latency' times single requests against the
+model as the API serves it, 'throughput_latency' is the per-image time
+inside the chunked pass, with one single-threaded worker per core.
+
+Usage:
+    python backend/evaluate_model.py [data_dir]
+
+Evaluates the saved model on the test split recorded in the dataset index.
+"""
+
+import os
+import copy
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import precision_recall_fscore_support, confusion_matrix
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+MODEL_DIR = BASE_DIR / 'backend' / 'models'
+MODEL_PATH = MODEL_DIR / 'RF_Classifier.pkl'
+REPORT_PATH = MODEL_DIR / 'evaluation_report.json'
+
+CATEGORIES = ['ORGANIC', 'NONORGANIC']
+CHUNK_SIZE = 256
+SERVING_LATENCY_SAMPLES = 200
+CALIBRATION_BINS = 10
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+# Set in each worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    # Copy so the inline path (workers=0) leaves the caller's model as is
+    _worker_model = copy.copy(model)
+    # One process per core already; don't let each fan out over all cores
+    if hasattr(_worker_model, 'n_jobs'):
+        _worker_model.n_jobs = 1
+
+
+def _predict_chunk(X_chunk):
+    """
+    Predict one chunk image by image, as the API does
+
+    Returns:
+        tuple: (probabilities, latencies_ms)
+    """
+    probabilities = np.empty((len(X_chunk), len(_worker_model.classes_)))
+    latencies = np.empty(len(X_chunk))
+    for i in range(len(X_chunk)):
+        start = time.perf_counter()
+        probabilities[i] = _worker_model.predict_proba(X_chunk[i:i + 1])[0]
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return probabilities, latencies
+
+
+def predict_in_chunks(model, X, chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Run per-image inference over X in bounded chunks
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    by the chunk size rather than the size of the test set.
+
+    Args:
+        model: Fitted classifier with predict_proba
+        X: Feature matrix (array or memmap)
+        chunk_size: Images per chunk
+        workers: Process count (default: os.cpu_count(); 0 runs inline)
+
+    Returns:
+        tuple: (probabilities, latencies_ms) arrays in the order of X
+    """
+    n_samples = len(X)
+    probabilities = np.empty((n_samples, len(model.classes_)))
+    latencies = np.empty(n_samples)
+    starts = range(0, n_samples, chunk_size)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 0:
+        _init_worker(model)
+        for start in starts:
+            end = start + chunk_size
+            probabilities[start:end], latencies[start:end] = _predict_chunk(X[start:end])
+        return probabilities, latencies
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model,)) as pool:
+        pending = {}
+        for start in starts:
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_start = pending.pop(future)
+                    chunk_end = chunk_start + chunk_size
+                    probabilities[chunk_start:chunk_end], latencies[chunk_start:chunk_end] = future.result()
+            pending[pool.submit(_predict_chunk, X[start:start + chunk_size])] = start
+
+        for future, chunk_start in pending.items():
+            chunk_end = chunk_start + chunk_size
+            probabilities[chunk_start:chunk_end], latencies[chunk_start:chunk_end] = future.result()
+
+    return probabilities, latencies
+
+
+def serving_latency(model, X, samples=SERVING_LATENCY_SAMPLES):
+    """
+    Time single-image predictions the way the API serves them
+
+    One request at a time, in this process, with the model's own n_jobs,
+    on an evenly spaced sample of X.
+
+    Args:
+        model: Fitted classifier with predict_proba
+        X: Feature matrix (array or memmap)
+        samples: Maximum number of images to time
+
+    Returns:
+        np.ndarray: Latencies in milliseconds
+    """
+    indices = np.linspace(0, len(X) - 1, min(samples, len(X))).astype(int)
+    # Warm-up, as a running server would be
+    model.predict_proba(X[indices[0]:indices[0] + 1])
+
+    latencies = np.empty(len(indices))
+    for i, index in enumerate(indices):
+        start = time.perf_counter()
+        model.predict_proba(X[index:index + 1])
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return latencies
+
+
+def calibration_curve(y_true, probabilities, n_bins=CALIBRATION_BINS):
+    """
+    Reliability curve for each class's probability
+
+    The API returns a probability per category, so each class gets its
+    own one-vs-rest curve: within each probability bin, the mean predicted
+    probability against the observed frequency of that class.
+
+    Args:
+        y_true: True class indices
+        probabilities: Predicted probabilities, one column per class
+        n_bins: Number of equal-width bins over [0, 1]
+
+    Returns:
+        dict: Curve and expected calibration error per category
+    """
+    edges = np.linspace(0.0, 1.0, n_bins + 1)
+    curves = {}
+    for class_index, category in enumerate(CATEGORIES):
+        predicted = probabilities[:, class_index]
+        observed = (y_true == class_index).astype(float)
+        bin_ids = np.clip(np.digitize(predicted, edges[1:-1]), 0, n_bins - 1)
+
+        bins = []
+        ece = 0.0
+        for b in range(n_bins):
+            mask = bin_ids == b
+            count = int(mask.sum())
+            if count == 0:
+                continue
+            mean_predicted = float(predicted[mask].mean())
+            frequency = float(observed[mask].mean())
+            ece += count / len(predicted) * abs(mean_predicted - frequency)
+            bins.append({
+                'lower': float(edges[b]),
+                'upper': float(edges[b + 1]),
+                'count': count,
+                'mean_predicted': round(mean_predicted, 4),
+                'observed_frequency': round(frequency, 4)
+            })
+
+        curves[category] = {
+            'bins': bins,
+            'expected_calibration_error': round(ece, 4)
+        }
+    return curves
+
+
+def latency_summary(latencies):
+    """Summarize per-image inference latencies (milliseconds)"""
+    counts, edges = np.histogram(latencies, bins=20)
+    summary = {
+        'count': int(len(latencies)),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'histogram': {
+            'edges_ms': [round(float(edge), 3) for edge in edges],
+            'counts': [int(count) for count in counts]
+        }
+    }
+    for percentile in LATENCY_PERCENTILES:
+        summary[f'p{percentile}_ms'] = round(float(np.percentile(latencies, percentile)), 3)
+    return summary
+
+
+def evaluate_model(model, X_test, y_test, chunk_size=CHUNK_SIZE, workers=None,
+                   latency_samples=SERVING_LATENCY_SAMPLES):
+    """
+    Evaluate a model and build the evaluation report
+
+    Args:
+        model: Fitted classifier
+        X_test: Test feature matrix
+        y_test: True class indices
+        chunk_size: Images per inference chunk
+        workers: Process count for inference
+        latency_samples: Images timed one at a time for serving latency
+
+    Returns:
+        tuple: (y_pred, report dict)
+    """
+    if len(X_test) == 0:
+        raise ValueError("Test set is empty")
+
+    probabilities, latencies = predict_in_chunks(model, X_test, chunk_size, workers)
+    y_pred = model.classes_[probabilities.argmax(axis=1)]
+
+    labels = list(range(len(CATEGORIES)))
+    precision, recall, f1, support = precision_recall_fscore_support(
+        y_test, y_pred, labels=labels, zero_division=0
+    )
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'test_samples': int(len(y_test)),
+        'accuracy': round(float(np.mean(y_pred == y_test)), 4),
+        'per_class': {
+            category: {
+                'precision': round(float(precision[i]), 4),
+                'recall': round(float(recall[i]), 4),
+                'f1': round(float(f1[i]), 4),
+                'support': int(support[i])
+            }
+            for i, category in enumerate(CATEGORIES)
+        },
+        'confusion_matrix': confusion_matrix(y_test, y_pred, labels=labels).tolist(),
+        'calibration': calibration_curve(y_test, probabilities),
+        'latency': latency_summary(serving_latency(model, X_test, latency_samples)),
+        'throughput_latency': latency_summary(latencies)
+    }
+    return y_pred, report
+
+
+def save_report(report, report_path=REPORT_PATH):
+    """
+    Write the evaluation report as JSON
+
+    Args:
+        report: Report dict from evaluate_model
+        report_path: Destination path
+    """
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = report_path.with_name(report_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, report_path)
+
+
+if __name__ == '__main__':
+    import sys
+    import pickle
+    from train_model import load_split_dataset
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else BASE_DIR / 'Data'
+
+    with open(MODEL_PATH, 'rb') as f:
+        model = pickle.load(f)
+
+    flat_data, target, n_train = load_split_dataset(data_dir, reuse_split=True)
+    _, report = evaluate_model(model, flat_data[n_train:], target[n_train:])
+    save_report(report)
+
+    logger.info(f"Accuracy: {report['accuracy'] * 100:.2f}%")
+    logger.info(f"Latency p50/p95: {report['latency']['p50_ms']} / {report['latency']['p95_ms']} ms")
+    logger.info(f"Throughput-mode latency p50/p95: {report['throughput_latency']['p50_ms']} / "
+                f"{report['throughput_latency']['p95_ms']} ms")
+    logger.info(f"Report saved to: {REPORT_PATH}")
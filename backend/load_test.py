@@ -0,0 +1,490 @@
+"""
+Load Test the Waste Classification API
+Replays images from Data/ against /api/predict on localhost and reports
+throughput, latency histograms, error rates and the server's per-stage
+timings (from the Server-Timing header).
+
+Load is either closed-loop (a fixed number of concurrent clients) or
+open-loop (requests scheduled at a fixed rate; latency is measured from
+the scheduled send time so server stalls aren't hidden). Each load level
+is one point of the throughput-versus-latency curve.
+
+Payload modes:
+- multipart: encoded image files, like the web frontend
+- tensor:    one pre-resized 150x150x3 uint8 image (application/octet-stream)
+- batch:     framed tensor batches of --batch-size images
+
+Usage:
+    # Against a running server
+    python backend/load_test.py --concurrency 1,2,4,8 --duration 10
+
+    # Spawn the server per setting and compare
+    python backend/load_test.py --spawn --server FLASK_THREADED=true \\
+        --server FLASK_THREADED=false,FLASK_PROCESSES=4 --rate 5,10,20
+
+    # Compare batch sizes
+    python backend/load_test.py --mode batch --batch-size 1,8,32
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import random
+import argparse
+import threading
+import tempfile
+import subprocess
+import http.client
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+BACKEND_DIR = BASE_DIR / 'backend'
+DATA_DIR = BASE_DIR / 'Data'
+DEFAULT_URL = 'http://127.0.0.1:5000'
+PREDICT_PATH = '/api/predict'
+
+IMAGE_SHAPE = (150, 150, 3)
+IMAGE_EXTENSIONS = {'.jpg', '.png', '.jpeg', '.bmp'}
+MODES = ('multipart', 'tensor', 'batch')
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+REQUEST_TIMEOUT = 30
+SERVER_START_TIMEOUT = 60
+MAX_OUTSTANDING = 256
+
+
+def list_images(data_dir, limit=None):
+    """List images under the category folders of a data directory"""
+    images = sorted(
+        path for path in Path(data_dir).glob('*/*')
+        if path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    if limit:
+        images = images[:limit]
+    if not images:
+        raise FileNotFoundError(f"No images found under {data_dir}")
+    return images
+
+
+def build_payloads(images, mode, batch_size=1):
+    """
+    Encode request bodies up front so the client spends no CPU on them
+
+    Args:
+        images: Image paths to replay
+        mode: One of MODES
+        batch_size: Images per request in batch mode
+
+    Returns:
+        list: (headers, body, image_count) tuples
+    """
+    if mode == 'multipart':
+        payloads = []
+        for path in images:
+            boundary = f'----loadtest{random.getrandbits(64):016x}'
+            body = b''.join([
+                f'--{boundary}\r\n'.encode('ascii'),
+                f'Content-Disposition: form-data; name="image"; filename="{path.name}"\r\n'.encode('utf-8'),
+                b'Content-Type: application/octet-stream\r\n\r\n',
+                path.read_bytes(),
+                f'\r\n--{boundary}--\r\n'.encode('ascii')
+            ])
+            headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+            payloads.append((headers, body, 1))
+        return payloads
+
+    # Tensor modes: resize client-side, as an edge device would
+    import numpy as np
+    from skimage.io import imread
+    from skimage.transform import resize
+    from utils import TENSOR_BATCH_HEADER, TENSOR_BATCH_MAGIC
+
+    tensors = [
+        (resize(imread(path), IMAGE_SHAPE) * 255).round().astype(np.uint8).tobytes()
+        for path in images
+    ]
+
+    if mode == 'tensor':
+        headers = {'Content-Type': 'application/octet-stream'}
+        return [(headers, tensor, 1) for tensor in tensors]
+
+    headers = {'Content-Type': 'application/x-waste-tensor-batch'}
+    payloads = []
+    for start in range(0, len(tensors), batch_size):
+        chunk = tensors[start:start + batch_size]
+        header = TENSOR_BATCH_HEADER.pack(TENSOR_BATCH_MAGIC, *IMAGE_SHAPE, len(chunk))
+        payloads.append((headers, header + b''.join(chunk), len(chunk)))
+    return payloads
+
+
+def parse_server_timing(value):
+    """Parse a Server-Timing header into {stage: duration_ms}"""
+    timings = {}
+    for metric in (value or '').split(','):
+        name, _, params = metric.strip().partition(';')
+        for param in params.split(';'):
+            key, _, duration = param.strip().partition('=')
+            if key == 'dur' and name:
+                timings[name] = float(duration)
+    return timings
+
+
+def send_request(host, port, headers, body):
+    """
+    Send one prediction request
+
+    Returns:
+        tuple: (status or error name, Server-Timing stages)
+    """
+    conn = http.client.HTTPConnection(host, port, timeout=REQUEST_TIMEOUT)
+    try:
+        conn.request('POST', PREDICT_PATH, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status, parse_server_timing(response.getheader('Server-Timing'))
+    except Exception as e:
+        return type(e).__name__, {}
+    finally:
+        conn.close()
+
+
+class Recorder:
+    """Thread-safe collection of request results"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.outcomes = {}
+        self.stages = {}
+        self.images = 0
+
+    def record(self, latency_ms, outcome, stages, image_count):
+        with self._lock:
+            self.outcomes[str(outcome)] = self.outcomes.get(str(outcome), 0) + 1
+            if outcome == 200:
+                self.latencies.append(latency_ms)
+                self.images += image_count
+                for stage, duration in stages.items():
+                    self.stages.setdefault(stage, []).append(duration)
+
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+def summarize(recorder, elapsed):
+    """
+    Build the result for one load level
+
+    Returns:
+        dict: Throughput, error rate, latency percentiles and histogram,
+        and mean / p95 server time per stage
+    """
+    latencies = sorted(recorder.latencies)
+    total = sum(recorder.outcomes.values())
+    errors = total - recorder.outcomes.get('200', 0)
+
+    histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    bucket = 0
+    for latency in latencies:
+        while bucket < len(HISTOGRAM_BOUNDS_MS) and latency > HISTOGRAM_BOUNDS_MS[bucket]:
+            bucket += 1
+        histogram[bucket] += 1
+
+    result = {
+        'requests': total,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'images_per_s': round(recorder.images / elapsed, 2) if elapsed else 0,
+        'error_rate': round(errors / total, 4) if total else 0,
+        'outcomes': recorder.outcomes,
+        'latency_ms': {f'p{p}': _percentile(latencies, p) for p in LATENCY_PERCENTILES},
+        'histogram': {
+            'bounds_ms': HISTOGRAM_BOUNDS_MS,
+            'counts': histogram
+        },
+        'server_stages_ms': {
+            stage: {
+                'mean': round(sum(values) / len(values), 3),
+                'p95': _percentile(sorted(values), 95)
+            }
+            for stage, values in recorder.stages.items()
+        }
+    }
+    result['latency_ms']['mean'] = round(sum(latencies) / len(latencies), 3) if latencies else None
+    result['latency_ms']['max'] = round(latencies[-1], 3) if latencies else None
+    return result
+
+
+def run_closed_loop(host, port, payloads, concurrency, duration):
+    """Keep `concurrency` requests in flight for `duration` seconds"""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        i = offset
+        while time.perf_counter() < deadline:
+            headers, body, image_count = payloads[i % len(payloads)]
+            start = time.perf_counter()
+            outcome, stages = send_request(host, port, headers, body)
+            recorder.record((time.perf_counter() - start) * 1000, outcome, stages, image_count)
+            i += concurrency
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(recorder, time.perf_counter() - start)
+
+
+def run_open_loop(host, port, payloads, rate, duration, max_outstanding=MAX_OUTSTANDING):
+    """
+    Send requests at `rate` per second (Poisson arrivals) for `duration`
+
+    Latency is measured from each request's scheduled time, so queueing
+    behind a slow server counts against it. Arrivals while max_outstanding
+    requests are already in flight are not sent; they count as 'dropped'
+    errors rather than piling up in a client-side queue.
+    """
+    recorder = Recorder()
+    rng = random.Random(0)
+    outstanding = threading.BoundedSemaphore(max_outstanding)
+
+    def fire(scheduled, payload):
+        try:
+            headers, body, image_count = payload
+            outcome, stages = send_request(host, port, headers, body)
+            recorder.record((time.perf_counter() - scheduled) * 1000, outcome, stages, image_count)
+        finally:
+            outstanding.release()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+        scheduled = start
+        i = 0
+        while scheduled < start + duration:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if outstanding.acquire(blocking=False):
+                pool.submit(fire, scheduled, payloads[i % len(payloads)])
+            else:
+                recorder.record(None, 'dropped', {}, 0)
+            i += 1
+            scheduled += rng.expovariate(rate)
+    return summarize(recorder, time.perf_counter() - start)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get_json(host, port, path):
+    conn = http.client.HTTPConnection(host, port, timeout=2)
+    try:
+        conn.request('GET', path)
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def start_server(env_overrides):
+    """
+    Start backend/app.py on a free localhost port
+
+    Args:
+        env_overrides: dict of environment settings (e.g. FLASK_PROCESSES)
+
+    Returns:
+        tuple: (process, port)
+    """
+    port = _free_port()
+    env = dict(os.environ, FLASK_HOST='127.0.0.1', FLASK_PORT=str(port),
+               FLASK_DEBUG='false', LOG_LEVEL='WARNING')
+    env.update(env_overrides)
+    # Keep the server's output (request log) off the terminal so it doesn't
+    # interleave with the results; stderr is kept for startup failures
+    server_log = tempfile.TemporaryFile()
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=str(BACKEND_DIR), env=env,
+                               stdout=subprocess.DEVNULL, stderr=server_log)
+
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            server_log.seek(0)
+            output = server_log.read().decode('utf-8', 'replace').strip()
+            raise RuntimeError(f"Server exited with code {process.returncode}\n{output[-2000:]}")
+        try:
+            health = _get_json('127.0.0.1', port, '/api/health')
+        except OSError:
+            time.sleep(0.25)
+            continue
+        if not health.get('model_loaded'):
+            stop_server(process)
+            raise RuntimeError("Server started without a model. Train it first: python backend/train_model.py")
+        return process, port
+
+    stop_server(process)
+    raise RuntimeError("Server did not start in time")
+
+
+def stop_server(process):
+    """Stop a server started by start_server"""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def parse_server_spec(spec):
+    """Parse 'KEY=VALUE,KEY=VALUE' into a dict"""
+    overrides = {}
+    for item in filter(None, spec.split(',')):
+        key, _, value = item.partition('=')
+        overrides[key.strip()] = value.strip()
+    return overrides
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+
+def _float_list(value):
+    return [float(item) for item in value.split(',') if item]
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Load test the Waste Classification API')
+    parser.add_argument('--url', default=DEFAULT_URL,
+                        help='Server to test (ignored with --spawn)')
+    parser.add_argument('--spawn', action='store_true',
+                        help='Start backend/app.py on localhost for each --server setting')
+    parser.add_argument('--server', action='append', default=None, metavar='SPEC',
+                        help='Server setting to spawn, as KEY=VALUE,... environment overrides '
+                             '(e.g. FLASK_THREADED=false,FLASK_PROCESSES=4); repeatable')
+    parser.add_argument('--mode', choices=MODES, default='multipart',
+                        help='Payload mode (default: multipart)')
+    parser.add_argument('--batch-size', type=_int_list, default=[8],
+                        help='Images per request in batch mode, comma-separated to compare')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--concurrency', type=_int_list, default=None,
+                      help='Closed-loop client counts, comma-separated (default: 1,2,4,8)')
+    load.add_argument('--rate', type=_float_list, default=None,
+                      help='Open-loop request rates per second, comma-separated')
+    parser.add_argument('--max-outstanding', type=int, default=MAX_OUTSTANDING,
+                        help='Open-loop requests in flight before arrivals are dropped '
+                             f'(default: {MAX_OUTSTANDING})')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds per load level (default: 10)')
+    parser.add_argument('--warmup', type=float, default=2,
+                        help='Warm-up seconds before each setting (default: 2)')
+    parser.add_argument('--data-dir', default=str(DATA_DIR),
+                        help='Images to replay (default: project_root/Data)')
+    parser.add_argument('--images', type=int, default=None,
+                        help='Only replay the first N images')
+    parser.add_argument('--output', default=None,
+                        help='Write the full results as JSON')
+    return parser.parse_args(argv)
+
+
+def print_curve(results):
+    """Print the throughput-versus-latency table"""
+    print()
+    print(f"{'setting':<40} {'load':>8} {'req/s':>8} {'img/s':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    print("-" * 104)
+    for result in results:
+        latency = result['latency_ms']
+        print(f"{result['setting']:<40} {result['load']:>8} {result['throughput_rps']:>8} "
+              f"{result['images_per_s']:>8} {str(latency['p50']):>9} {str(latency['p95']):>9} "
+              f"{str(latency['p99']):>9} {result['error_rate'] * 100:>6.1f}%")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.rate:
+        levels = [('rate', rate) for rate in args.rate]
+    else:
+        levels = [('concurrency', level) for level in (args.concurrency or [1, 2, 4, 8])]
+
+    images = list_images(args.data_dir, args.images)
+    batch_sizes = args.batch_size if args.mode == 'batch' else [1]
+    payload_sets = {size: build_payloads(images, args.mode, size) for size in batch_sizes}
+    print(f"Replaying {len(images)} images in {args.mode} mode")
+
+    servers = [parse_server_spec(spec) for spec in (args.server or [''])] if args.spawn else [None]
+
+    results = []
+    for server in servers:
+        process = None
+        if server is None:
+            url = urlparse(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            process, port = start_server(server)
+            host = '127.0.0.1'
+        try:
+            for batch_size, payloads in payload_sets.items():
+                setting = ','.join(f'{key}={value}' for key, value in (server or {}).items()) or 'server'
+                if args.mode == 'batch':
+                    setting += f' batch={batch_size}'
+                if args.warmup > 0:
+                    run_closed_loop(host, port, payloads, 1, args.warmup)
+
+                for kind, level in levels:
+                    if kind == 'rate':
+                        result = run_open_loop(host, port, payloads, level, args.duration,
+                                               args.max_outstanding)
+                    else:
+                        result = run_closed_loop(host, port, payloads, level, args.duration)
+                    result.update({'setting': setting, 'load': f'{kind[0]}={level}', 'mode': args.mode})
+                    results.append(result)
+                    print(f"{setting} {kind}={level}: {result['throughput_rps']} req/s, "
+                          f"p95 {result['latency_ms']['p95']} ms, "
+                          f"errors {result['error_rate'] * 100:.1f}%")
+        finally:
+            if process is not None:
+                stop_server(process)
+
+    print_curve(results)
+
+    stage_names = sorted({stage for result in results for stage in result['server_stages_ms']})
+    if stage_names:
+        print()
+        print("Server stage means (ms): " + ", ".join(stage_names))
+        for result in results:
+            stages = result['server_stages_ms']
+            print(f"{result['setting']:<40} {result['load']:>8} " + " ".join(
+                f"{stages[name]['mean'] if name in stages else '-':>9}" for name in stage_names
+            ))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nLoad test interrupted by user.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
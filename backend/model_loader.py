@@ -3,6 +3,7 @@ Model loading and management utilities
 """
 
 import os
+import json
 import pickle
 import logging
 from pathlib import Path
@@ -13,15 +14,18 @@ logger = logging.getLogger(__name__)
 class ModelLoader:
     """Handles loading and management of ML models"""
     
-    def __init__(self, model_path):
+    def __init__(self, model_path, report_path=None):
         """
         Initialize ModelLoader
         
         Args:
             model_path: Path to the model file
+            report_path: Path to the evaluation report written by training
         """
         self.model_path = Path(model_path)
+        self.report_path = Path(report_path) if report_path else None
         self.model = None
+        self.report = None
         self.is_loaded = False
     
     def load(self):
@@ -41,6 +45,7 @@ class ModelLoader:
             
             self.is_loaded = True
             logger.info(f"Model loaded successfully from {self.model_path}")
+            self.load_report()
             return True
             
         except Exception as e:
@@ -48,6 +53,24 @@ class ModelLoader:
             self.is_loaded = False
             return False
     
+    def load_report(self):
+        """
+        Load the evaluation report, if training produced one
+        
+        Returns:
+            dict: Evaluation report, or None if unavailable
+        """
+        self.report = None
+        if self.report_path is None or not self.report_path.exists():
+            return None
+        
+        try:
+            with open(self.report_path, 'r', encoding='utf-8') as f:
+                self.report = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read evaluation report: {str(e)}")
+        return self.report
+    
     def predict(self, image_data):
         """
         Make prediction on image data
@@ -66,6 +89,30 @@ class ModelLoader:
         
         return prediction, probabilities
     
+    def predict_batch(self, features):
+        """
+        Make predictions on a batch of feature rows
+        
+        Args:
+            features: Feature matrix, one row per image
+            
+        Returns:
+            tuple: (predictions, probabilities) arrays
+        """
+        if not self.is_loaded or self.model is None:
+            raise ValueError("Model is not loaded")
+        
+        # predict() is the argmax of predict_proba, so one pass is enough
+        probabilities = self.model.predict_proba(features)
+        predictions = self.model.classes_[probabilities.argmax(axis=1)]
+        
+        return predictions, probabilities
+    
+    @property
+    def n_features(self):
+        """Number of input features the loaded model expects, if known"""
+        return getattr(self.model, 'n_features_in_', None)
+    
     def get_status(self):
         """
         Get model status information
@@ -76,5 +123,7 @@ class ModelLoader:
         return {
             'is_loaded': self.is_loaded,
             'model_path': str(self.model_path),
-            'model_exists': self.model_path.exists()
+            'model_exists': self.model_path.exists(),
+            'n_features': self.n_features,
+            'evaluation': self.report
         }
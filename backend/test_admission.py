@@ -0,0 +1,79 @@
+"""
+Regression checks for upload admission control
+
+Usage:
+    cd backend && python -m unittest test_admission
+"""
+
+import io
+import struct
+import unittest
+
+from admission import AdmissionController
+
+BOUNDARY = 'testboundary'
+PEEK_SIZE = 16 * 1024
+PNG_HEADER = b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', 150, 150)
+
+
+def make_controller():
+    return AdmissionController(
+        max_content_length=16 * 1024 * 1024, max_inflight=2, max_inflight_large=1,
+        large_upload_size=2 * 1024 * 1024, header_peek_size=PEEK_SIZE,
+        max_image_pixels=40 * 1000 * 1000, allowed_extensions={'png', 'jpg', 'jpeg'}
+    )
+
+
+def multipart_environ(padding, image=PNG_HEADER + b'\0' * 1024):
+    """Multipart body with a text field of `padding` bytes ahead of the image"""
+    body = (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="note"\r\n\r\n'.encode()
+        + b'x' * padding
+        + f'\r\n--{BOUNDARY}\r\nContent-Disposition: form-data; name="image"; '
+          f'filename="image.png"\r\nContent-Type: image/png\r\n\r\n'.encode()
+        + image
+        + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    )
+    return {
+        'CONTENT_LENGTH': str(len(body)),
+        'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+        'wsgi.input': io.BytesIO(body)
+    }
+
+
+class FailingStream:
+    def read(self, size=-1):
+        raise OSError('client disconnected')
+
+
+class AdmissionTest(unittest.TestCase):
+
+    def test_image_field_near_peek_boundary_is_admitted(self):
+        # Padding that leaves 0-16 bytes of the image inside the peek window
+        for padding in range(16180, 16240):
+            controller = make_controller()
+            slots, rejection = controller.admit(multipart_environ(padding))
+            self.assertIsNone(rejection, f'padding={padding}: {rejection}')
+            controller.release(slots)
+
+    def test_non_image_is_rejected(self):
+        controller = make_controller()
+        _, rejection = controller.admit(multipart_environ(100, b'not an image at all'))
+        self.assertEqual(rejection.status, 415)
+
+    def test_slots_released_when_body_read_fails(self):
+        controller = make_controller()
+        environ = multipart_environ(100)
+        environ['wsgi.input'] = FailingStream()
+        for _ in range(controller.max_inflight + 1):
+            with self.assertRaises(OSError):
+                controller.admit(environ)
+        self.assertEqual(controller.active, 0)
+
+        slots, rejection = controller.admit(multipart_environ(100))
+        self.assertIsNone(rejection)
+        controller.release(slots)
+
+
+if __name__ == '__main__':
+    unittest.main()
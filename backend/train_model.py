@@ -4,16 +4,22 @@ This script trains a Random Forest classifier on waste images
 """
 
 import os
+import sys
+import argparse
 import numpy as np
 import pickle
 from pathlib import Path
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.metrics import classification_report
 from skimage.io import imread
 from skimage.transform import resize
 import logging
 
+# dataset_index lives at the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset_index import open_index, scan_dataset, stratified_split
+from evaluate_model import evaluate_model, save_report
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -23,32 +29,154 @@ BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / 'Data'
 MODEL_DIR = BASE_DIR / 'backend' / 'models'
 MODEL_PATH = MODEL_DIR / 'RF_Classifier.pkl'
+REPORT_PATH = MODEL_DIR / 'evaluation_report.json'
 
 CATEGORIES = ['ORGANIC', 'NONORGANIC']
+IMAGE_SHAPE = (150, 150, 3)
+N_FEATURES = IMAGE_SHAPE[0] * IMAGE_SHAPE[1] * IMAGE_SHAPE[2]
+FEATURE_CACHE_FILENAME = '.feature_cache.f32'
+# Rewrite the feature cache once less than this fraction of it is live
+CACHE_COMPACT_THRESHOLD = 0.5
+TEST_SIZE = 0.30
+
+
+def preprocess_file(img_path):
+    """Read, resize and flatten a single image"""
+    img = imread(img_path)
+    return resize(img, IMAGE_SHAPE).flatten()
 
 
-def load_and_preprocess_images(data_dir):
+def load_features(index, rows, cache_path):
     """
-    Load and preprocess images from data directory
+    Load flattened features for indexed images
+    
+    Features are kept in a float32 cache file next to the index (Random
+    Forest works in float32 internally, so nothing is lost). Rows whose
+    content hash already has a feature offset are read from the cache;
+    only new or changed images are decoded and appended to it.
     
     Args:
-        data_dir: Path to data directory containing category folders
+        index: DatasetIndex the rows came from
+        rows: Index rows to load, each with a category label
+        cache_path: Path to the feature cache file
         
     Returns:
-        tuple: (flat_data, target) arrays
+        tuple: (flat_data, target, loaded_rows); rows that failed to
+        decode are left out, the rest keep their order
     """
-    flat_data_arr = []
-    target_arr = []
+    row_bytes = N_FEATURES * np.dtype(np.float32).itemsize
+    cache_path = Path(cache_path)
+    cached_rows = cache_path.stat().st_size // row_bytes if cache_path.exists() else 0
+    cache = None
+    if cached_rows:
+        cache = np.memmap(cache_path, dtype=np.float32, mode='r', shape=(cached_rows, N_FEATURES))
     
-    data_path = Path(data_dir)
+    cached_offsets = {
+        row['sha256']: row['feature_offset'] for row in rows
+        if row['feature_offset'] is not None and row['feature_offset'] < cached_rows
+    }
     
-    # Check if data directory exists
-    if not data_path.exists():
-        raise FileNotFoundError(f"Data directory not found: {data_dir}")
+    flat_data = np.empty((len(rows), N_FEATURES), dtype=np.float32)
+    target = np.empty(len(rows), dtype=np.int64)
+    decoded_at = {}
+    new_offsets = []
+    loaded_rows = []
+    loaded = 0
     
-    logger.info(f"Loading images from: {data_path}")
+    with open(cache_path, 'ab') as cache_file:
+        # Drop a partial row left by an interrupted run
+        cache_file.truncate(cached_rows * row_bytes)
+        next_offset = cached_rows
+        
+        for row in rows:
+            sha256 = row['sha256']
+            if sha256 in cached_offsets:
+                offset = cached_offsets[sha256]
+                flat_data[loaded] = cache[offset]
+            elif sha256 in decoded_at:
+                offset, source = decoded_at[sha256]
+                flat_data[loaded] = flat_data[source]
+            else:
+                try:
+                    flat_data[loaded] = preprocess_file(index.resolve(row['path']))
+                except Exception as e:
+                    logger.error(f"Error processing {row['path']}: {e}")
+                    continue
+                cache_file.write(flat_data[loaded].tobytes())
+                offset = next_offset
+                next_offset += 1
+                decoded_at[sha256] = (offset, loaded)
+            
+            if row['feature_offset'] != offset:
+                new_offsets.append((row['path'], offset))
+            target[loaded] = CATEGORIES.index(row['label'])
+            loaded_rows.append(row)
+            loaded += 1
+    
+    index.set_feature_offsets(new_offsets)
+    logger.info(f"Decoded {len(decoded_at)} images, {loaded - len(decoded_at)} loaded from feature cache")
+    
+    return flat_data[:loaded], target[:loaded], loaded_rows
+
+
+def compact_feature_cache(index, cache_path):
+    """
+    Drop feature rows no indexed image points at any more
+    
+    Rows of changed or deleted images are dead weight in the append-only
+    cache. Once live rows fall below CACHE_COMPACT_THRESHOLD, the live rows
+    are copied to a new file and the index offsets remapped; a cache with
+    no live rows at all (e.g. next to a new index) is emptied.
     
-    # Process each category
+    Args:
+        index: DatasetIndex holding the feature offsets
+        cache_path: Path to the feature cache file
+    """
+    cache_path = Path(cache_path)
+    if not cache_path.exists():
+        return
+    
+    row_bytes = N_FEATURES * np.dtype(np.float32).itemsize
+    cached_rows = cache_path.stat().st_size // row_bytes
+    offsets = [(path_key, offset) for path_key, offset in index.feature_offsets()
+               if offset < cached_rows]
+    live = sorted({offset for _, offset in offsets})
+    if cached_rows == 0 or len(live) >= cached_rows * CACHE_COMPACT_THRESHOLD:
+        return
+    
+    logger.info(f"Compacting feature cache: {len(live)} of {cached_rows} rows live")
+    remap = {offset: new_offset for new_offset, offset in enumerate(live)}
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    if live:
+        cache = np.memmap(cache_path, dtype=np.float32, mode='r', shape=(cached_rows, N_FEATURES))
+        with open(tmp_path, 'wb') as f:
+            for offset in live:
+                f.write(cache[offset].tobytes())
+        del cache
+    else:
+        open(tmp_path, 'wb').close()
+    os.replace(tmp_path, cache_path)
+    
+    index.clear_feature_offsets()
+    index.set_feature_offsets([(path_key, remap[offset]) for path_key, offset in offsets])
+
+
+def index_dataset(index, data_path):
+    """
+    Update the dataset index and return the rows of every category
+    
+    Args:
+        index: DatasetIndex rooted at data_path
+        data_path: Path to data directory containing category folders
+        
+    Returns:
+        list: Index rows, grouped by category
+    """
+    # Incremental: only new or changed files are hashed
+    scan_dataset(index, data_path, CATEGORIES)
+    compact_feature_cache(index, data_path / FEATURE_CACHE_FILENAME)
+    
+    rows = []
     for category in CATEGORIES:
         category_path = data_path / category
         
@@ -56,42 +184,96 @@ def load_and_preprocess_images(data_dir):
             logger.warning(f"Category folder not found: {category_path}")
             continue
         
-        logger.info(f"Processing category: {category}")
-        image_files = list(category_path.glob('*.jpg')) + list(category_path.glob('*.png')) + \
-                      list(category_path.glob('*.jpeg')) + list(category_path.glob('*.bmp'))
-        
-        if len(image_files) == 0:
+        category_rows = index.files(label=category)
+        if len(category_rows) == 0:
             logger.warning(f"No images found in {category_path}")
             continue
         
-        for img_path in image_files:
-            try:
-                # Read and resize image
-                img = imread(img_path)
-                img_resized = resize(img, (150, 150, 3))
-                
-                # Flatten image
-                flat_data_arr.append(img_resized.flatten())
-                target_arr.append(CATEGORIES.index(category))
-                
-            except Exception as e:
-                logger.error(f"Error processing {img_path}: {e}")
-                continue
-        
-        logger.info(f"Loaded {len([t for t in target_arr if t == CATEGORIES.index(category)])} images for {category}")
+        logger.info(f"Indexed {len(category_rows)} images for {category}")
+        rows.extend(category_rows)
     
-    if len(flat_data_arr) == 0:
+    return rows
+
+
+def _open_data_index(data_dir):
+    data_path = Path(data_dir)
+    
+    # Check if data directory exists
+    if not data_path.exists():
+        raise FileNotFoundError(f"Data directory not found: {data_dir}")
+    
+    logger.info(f"Loading images from: {data_path}")
+    
+    index = open_index(data_path)
+    if not (data_path / FEATURE_CACHE_FILENAME).exists():
+        index.clear_feature_offsets()
+    return data_path, index
+
+
+def _log_loaded(target):
+    for i, category in enumerate(CATEGORIES):
+        logger.info(f"Loaded {int(np.sum(target == i))} images for {category}")
+    
+    if len(target) == 0:
         raise ValueError("No images were loaded! Please check your Data directory structure.")
+
+
+def load_split_dataset(data_dir, test_size=TEST_SIZE, reuse_split=False):
+    """
+    Load images ordered as [train rows | test rows]
+    
+    The split is computed per class from content hashes (see
+    dataset_index.stratified_split) and written to the dataset index.
+    Because rows are loaded train-first, the train and test sets are plain
+    slices of one array - no copies are made when splitting.
     
-    return np.array(flat_data_arr), np.array(target_arr)
+    Args:
+        data_dir: Path to data directory containing category folders
+        test_size: Fraction of each class held out for testing
+        reuse_split: Use the split recorded in the index instead of
+            computing a new one; files without a recorded split are skipped
+        
+    Returns:
+        tuple: (flat_data, target, n_train); X_train is flat_data[:n_train]
+    """
+    data_path, index = _open_data_index(data_dir)
+    with index:
+        rows = index_dataset(index, data_path)
+        
+        if reuse_split:
+            splits = {row['path']: row['split'] for row in rows if row['split'] is not None}
+            if len(splits) < len(rows):
+                logger.warning(f"{len(rows) - len(splits)} images have no recorded split and will be skipped")
+            if not splits:
+                raise ValueError("No split recorded in the dataset index. Run training once without --reuse-split.")
+        else:
+            if not 0 < test_size < 1:
+                raise ValueError(f"test_size must be between 0 and 1, got {test_size}")
+            splits = stratified_split(rows, test_size)
+            # Keep the recorded split if the new one is unusable
+            if 'train' not in splits.values() or 'test' not in splits.values():
+                raise ValueError(f"test_size {test_size} leaves the train or test set empty")
+            index.set_splits(splits)
+        
+        ordered = [row for row in rows if splits.get(row['path']) == 'train'] + \
+                  [row for row in rows if splits.get(row['path']) == 'test']
+        flat_data, target, loaded_rows = load_features(
+            index, ordered, data_path / FEATURE_CACHE_FILENAME
+        )
+    
+    _log_loaded(target)
+    n_train = sum(1 for row in loaded_rows if splits[row['path']] == 'train')
+    return flat_data, target, n_train
 
 
-def train_model(data_dir=None):
+def train_model(data_dir=None, test_size=TEST_SIZE, reuse_split=False):
     """
     Train the Random Forest classifier
     
     Args:
         data_dir: Path to data directory (default: project_root/Data)
+        test_size: Fraction of each class held out for testing
+        reuse_split: Reproduce the train/test split recorded in the index
     """
     if data_dir is None:
         data_dir = DATA_DIR
@@ -103,7 +285,7 @@ def train_model(data_dir=None):
     # Load and preprocess images
     logger.info("Step 1: Loading and preprocessing images...")
     try:
-        flat_data, target = load_and_preprocess_images(data_dir)
+        flat_data, target, n_train = load_split_dataset(data_dir, test_size, reuse_split)
         logger.info(f"Loaded {len(flat_data)} images total")
         logger.info(f"Image shape: {flat_data[0].shape}")
     except Exception as e:
@@ -118,34 +300,44 @@ def train_model(data_dir=None):
         logger.error("      └── image2.jpg")
         return False
     
-    # Split data
+    # Split data (views into flat_data, rows are already ordered train-first)
     logger.info("\nStep 2: Splitting data into train/test sets...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        flat_data, target, test_size=0.30, random_state=77
-    )
+    X_train, X_test = flat_data[:n_train], flat_data[n_train:]
+    y_train, y_test = target[:n_train], target[n_train:]
     logger.info(f"Training samples: {len(X_train)}")
     logger.info(f"Test samples: {len(X_test)}")
     
+    if len(X_train) == 0 or len(X_test) == 0:
+        logger.error("Train and test sets must both contain images. "
+                     "Add more images or adjust --test-size.")
+        return False
+
     # Train model
     logger.info("\nStep 3: Training Random Forest classifier...")
     rf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
     rf.fit(X_train, y_train)
     logger.info("Training completed!")
     
-    # Evaluate model
+    # Evaluate model (chunked, on a process pool)
     logger.info("\nStep 4: Evaluating model...")
-    y_pred = rf.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred) * 100
-    logger.info(f"Accuracy: {accuracy:.2f}%")
+    y_pred, report = evaluate_model(rf, X_test, y_test)
+    logger.info(f"Accuracy: {report['accuracy'] * 100:.2f}%")
     
     # Classification report
     logger.info("\nClassification Report:")
-    logger.info("\n" + classification_report(y_test, y_pred, target_names=CATEGORIES))
+    logger.info("\n" + classification_report(y_test, y_pred, labels=[0, 1],
+                                             target_names=CATEGORIES, zero_division=0))
     
     # Confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
     logger.info("\nConfusion Matrix:")
-    logger.info(f"\n{cm}")
+    logger.info(f"\n{np.array(report['confusion_matrix'])}")
+    
+    latency = report['latency']
+    logger.info(f"\nInference latency per request: p50 {latency['p50_ms']} ms, "
+                f"p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms")
+    latency = report['throughput_latency']
+    logger.info(f"Per-image latency in throughput mode (one worker per core): "
+                f"p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms")
     
     # Save model
     logger.info("\nStep 5: Saving model...")
@@ -155,6 +347,9 @@ def train_model(data_dir=None):
         pickle.dump(rf, f)
     
     logger.info(f"Model saved to: {MODEL_PATH}")
+    
+    save_report(report, REPORT_PATH)
+    logger.info(f"Evaluation report saved to: {REPORT_PATH}")
     logger.info("\n" + "=" * 60)
     logger.info("Training completed successfully!")
     logger.info("=" * 60)
@@ -162,14 +357,27 @@ def train_model(data_dir=None):
     return True
 
 
+def _fraction(value):
+    """argparse type for a fraction strictly between 0 and 1"""
+    fraction = float(value)
+    if not 0 < fraction < 1:
+        raise argparse.ArgumentTypeError(f"must be between 0 and 1, got {value}")
+    return fraction
+
+
 if __name__ == '__main__':
-    import sys
-    
+    parser = argparse.ArgumentParser(description='Train the Waste Classification Model')
     # Allow custom data directory
-    data_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    parser.add_argument('data_dir', nargs='?', default=None,
+                        help='Data directory (default: project_root/Data)')
+    parser.add_argument('--test-size', type=_fraction, default=TEST_SIZE,
+                        help='Fraction of each class held out for testing')
+    parser.add_argument('--reuse-split', action='store_true',
+                        help='Reproduce the split recorded in the dataset index')
+    args = parser.parse_args()
     
     try:
-        success = train_model(data_dir)
+        success = train_model(args.data_dir, args.test_size, args.reuse_split)
         if success:
             print("\n✅ Model training completed! You can now run the backend server.")
         else:
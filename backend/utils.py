@@ -3,6 +3,7 @@ Utility functions for image preprocessing and validation
 """
 
 import os
+import struct
 import logging
 from pathlib import Path
 from werkzeug.utils import secure_filename
@@ -57,6 +58,169 @@ def preprocess_image(image_path):
         raise
 
 
+# JPEG start-of-frame markers (carry the image dimensions)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                     0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_dimensions(data):
+    """Walk JPEG markers up to the start-of-frame; (None, None) if not reached"""
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None, None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers have no length field
+            pos += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            if pos + 9 > len(data):
+                return None, None
+            height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+            return width, height
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        pos += 2 + length
+    return None, None
+
+
+# Longest signature sniff_image_header matches (PNG)
+IMAGE_SIGNATURE_SIZE = 8
+
+
+def sniff_image_header(data):
+    """
+    Identify an image and its dimensions from its first bytes
+    
+    Only the header is parsed, so this works on a prefix of the upload
+    before the full body has been received.
+    
+    Args:
+        data: Leading bytes of the image
+        
+    Returns:
+        tuple: (format, width, height), width/height None if the header
+        extends past data; None if data is not a supported image format
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(data) >= 24 and data[12:16] == b'IHDR':
+            width, height = struct.unpack('>II', data[16:24])
+            return 'png', width, height
+        return 'png', None, None
+    
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        if len(data) >= 10:
+            width, height = struct.unpack('<HH', data[6:10])
+            return 'gif', width, height
+        return 'gif', None, None
+    
+    if data.startswith(b'BM'):
+        if len(data) >= 26:
+            header_size = struct.unpack('<I', data[14:18])[0]
+            if header_size == 12:
+                width, height = struct.unpack('<HH', data[18:22])
+            else:
+                width, height = struct.unpack('<ii', data[18:26])
+            return 'bmp', width, abs(height)
+        return 'bmp', None, None
+    
+    if data.startswith(b'\xff\xd8'):
+        width, height = _jpeg_dimensions(data)
+        return 'jpeg', width, height
+    
+    return None
+
+
+# Framed tensor batch: magic, height, width, channels, reserved, count
+TENSOR_BATCH_MAGIC = b'WTB1'
+TENSOR_BATCH_HEADER = struct.Struct('<4sHHBxI')
+# Binary prediction response: count, then per image the class index and
+# one probability per category
+BINARY_RESPONSE_HEADER = struct.Struct('<I')
+
+
+def decode_tensor_payload(body, image_shape, framed=False):
+    """
+    Wrap a raw uint8 tensor upload as an array without copying it
+    
+    A raw payload is exactly one image of image_shape. A framed batch
+    starts with TENSOR_BATCH_HEADER (height, width, channels, count) and
+    is followed by count images back to back.
+    
+    Args:
+        body: Request body bytes
+        image_shape: Expected (height, width, channels)
+        framed: Whether the body is a framed batch
+        
+    Returns:
+        numpy.ndarray: Read-only uint8 view of shape (count, *image_shape)
+        
+    Raises:
+        ValueError: If the payload doesn't match image_shape
+    """
+    image_size = int(np.prod(image_shape))
+    offset = 0
+    
+    if framed:
+        if len(body) < TENSOR_BATCH_HEADER.size:
+            raise ValueError('Tensor batch is missing its header')
+        magic, height, width, channels, count = TENSOR_BATCH_HEADER.unpack_from(body)
+        if magic != TENSOR_BATCH_MAGIC:
+            raise ValueError('Not a tensor batch (bad magic)')
+        if (height, width, channels) != tuple(image_shape):
+            raise ValueError(f'Tensor shape {height}x{width}x{channels} does not match '
+                             f'model input {"x".join(map(str, image_shape))}')
+        offset = TENSOR_BATCH_HEADER.size
+    else:
+        count = 1
+    
+    if count == 0 or len(body) - offset != count * image_size:
+        raise ValueError(f'Expected {count} x {image_size} bytes of uint8 image data, '
+                         f'got {len(body) - offset}')
+    
+    return np.frombuffer(body, dtype=np.uint8, offset=offset).reshape((count,) + tuple(image_shape))
+
+
+def tensor_to_features(images):
+    """
+    Convert uint8 images already at the model's input size to features
+    
+    Matches preprocess_image, where resize scales pixels to [0, 1].
+    
+    Args:
+        images: uint8 array of shape (count, height, width, channels)
+        
+    Returns:
+        numpy.ndarray: float32 features of shape (count, height * width * channels)
+    """
+    features = images.reshape(len(images), -1).astype(np.float32)
+    features /= 255.0
+    return features
+
+
+def encode_binary_predictions(predictions, probabilities):
+    """
+    Encode predictions in the compact binary response format
+    
+    Args:
+        predictions: Class index per image
+        probabilities: Probability per category per image
+        
+    Returns:
+        bytes: Count header followed by (uint8 class, float32 probabilities) per image
+    """
+    records = np.empty(len(predictions), dtype=[
+        ('prediction', '<u1'), ('probabilities', '<f4', (probabilities.shape[1],))
+    ])
+    records['prediction'] = predictions
+    records['probabilities'] = probabilities
+    return BINARY_RESPONSE_HEADER.pack(len(predictions)) + records.tobytes()
+
+
 def validate_image_file(file, allowed_extensions, max_size):
     """
     Validate uploaded image file
@@ -0,0 +1,500 @@
+"""
+Dataset Index
+Persistent SQLite manifest of the images under Data/ (and other image
+folders such as 'test images'), recording path, label, size, mtime,
+dimensions, content hash and cached-feature offset for every file.
+
+Scans are incremental: only files whose size or mtime changed are hashed
+and have their headers read, so listing, splitting, class-balance reports
+and cache lookups don't need a directory walk or any decoding.
+
+Usage:
+    python dataset_index.py            # update index and print class balance
+    python dataset_index.py "test images"
+"""
+
+import os
+import sys
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration
+BASE_DIR = Path(__file__).parent
+DATA_DIR = BASE_DIR / 'Data'
+INDEX_FILENAME = '.dataset_index.sqlite'
+
+CATEGORIES = ['ORGANIC', 'NONORGANIC']
+IMAGE_EXTENSIONS = {'.jpg', '.png', '.jpeg', '.bmp'}
+HASH_CHUNK_SIZE = 1024 * 1024
+SPLIT_SEED = 77
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    label TEXT,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    format TEXT,
+    sha256 TEXT NOT NULL,
+    feature_offset INTEGER,
+    split TEXT
+);
+CREATE INDEX IF NOT EXISTS images_directory ON images (directory);
+CREATE INDEX IF NOT EXISTS images_label ON images (label);
+CREATE INDEX IF NOT EXISTS images_sha256 ON images (sha256);
+"""
+
+
+def scan_images(directory):
+    """
+    List image files in a directory with a single os.scandir pass
+
+    Args:
+        directory: Directory to scan
+
+    Returns:
+        list: os.DirEntry objects for image files, sorted by name
+    """
+    with os.scandir(directory) as it:
+        entries = [
+            entry for entry in it
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+        ]
+    return sorted(entries, key=lambda entry: entry.name)
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_image_info(path):
+    """
+    Read image dimensions and format from the file header
+
+    Pillow only parses the header here; pixel data is never decoded.
+
+    Args:
+        path: Path to the image file
+
+    Returns:
+        tuple: (width, height, format), all None if unreadable
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, None, None
+
+    try:
+        with Image.open(path) as img:
+            return img.width, img.height, img.format
+    except Exception:
+        return None, None, None
+
+
+def _split_rank(sha256, seed):
+    return hashlib.sha256(f'{seed}:{sha256}'.encode('ascii')).hexdigest()
+
+
+def stratified_split(rows, test_size=0.30, seed=SPLIT_SEED):
+    """
+    Deterministic stratified train/test split keyed on file content
+
+    Within each label, files are ranked by a seeded hash of their content
+    hash and the first round(n * test_size) go to the test set. No RNG or
+    file order is involved, every class gets its exact share, and adding
+    files to a class only moves files that sit near the boundary.
+
+    Args:
+        rows: Index rows with 'path', 'label' and 'sha256'
+        test_size: Fraction of each class to put in the test set
+        seed: Seed mixed into the ranking hash
+
+    Returns:
+        dict: 'train' or 'test' keyed by path key
+    """
+    by_label = {}
+    for row in rows:
+        by_label.setdefault(row['label'], []).append(row)
+
+    splits = {}
+    for members in by_label.values():
+        ranked = sorted(members, key=lambda row: (_split_rank(row['sha256'], seed), row['path']))
+        n_test = int(round(len(ranked) * test_size))
+        for i, row in enumerate(ranked):
+            splits[row['path']] = 'test' if i < n_test else 'train'
+    return splits
+
+
+def describe_image(path):
+    """
+    Hash and header-read a file (safe to run on worker threads)
+
+    Args:
+        path: Path to the image file
+
+    Returns:
+        tuple: (sha256, width, height, format)
+    """
+    width, height, fmt = read_image_info(path)
+    return file_digest(path), width, height, fmt
+
+
+def _describe_or_skip(path):
+    try:
+        return describe_image(path)
+    except OSError as e:
+        logger.error(f"Error processing {path}: {e}")
+        return None
+
+
+class DatasetIndex:
+    """SQLite-backed index of image files and their metadata"""
+
+    def __init__(self, index_path, root):
+        """
+        Initialize DatasetIndex
+
+        Args:
+            index_path: Path to the SQLite index file
+            root: Directory that stored paths are relative to
+        """
+        self.index_path = Path(index_path)
+        self.root = Path(root).resolve()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.index_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+        # Indexes created before splits were recorded
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(images)')}
+        if 'split' not in columns:
+            self.conn.execute('ALTER TABLE images ADD COLUMN split TEXT')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Commit pending changes and close the database"""
+        self.conn.commit()
+        self.conn.close()
+
+    def key(self, path):
+        """Return the stored (root-relative, '/'-separated) key for a path"""
+        path = os.path.abspath(path)
+        try:
+            return Path(os.path.relpath(path, str(self.root))).as_posix()
+        except ValueError:
+            # Different drive on Windows
+            return Path(path).as_posix()
+
+    def resolve(self, key):
+        """Return the filesystem path for a stored key"""
+        return Path(os.path.normpath(str(self.root / key)))
+
+    def scan(self, directory, label=None, workers=None):
+        """
+        Incrementally bring the index in line with a directory
+
+        New and modified files are hashed and header-read on a thread
+        pool; unchanged files are skipped and deleted files are dropped.
+        A file whose content hash is unchanged keeps its feature offset
+        and split.
+
+        Args:
+            directory: Directory to scan
+            label: Label to record for files in this directory
+            workers: Thread pool size for hashing
+
+        Returns:
+            dict: Counts of added, updated, removed, unchanged and skipped
+            (unreadable) files
+        """
+        directory = Path(directory).resolve()
+        directory_key = self.key(directory)
+
+        known = {
+            row['path']: row for row in self.conn.execute(
+                'SELECT path, label, size, mtime_ns FROM images WHERE directory = ?',
+                (directory_key,)
+            )
+        }
+
+        changed = []
+        seen = set()
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'skipped': 0}
+        for entry in scan_images(directory):
+            try:
+                stat = entry.stat()
+            except OSError as e:
+                logger.error(f"Error processing {entry.path}: {e}")
+                counts['skipped'] += 1
+                continue
+            path_key = self.key(entry.path)
+            seen.add(path_key)
+            row = known.get(path_key)
+            if row is None:
+                counts['added'] += 1
+            elif row['size'] != stat.st_size or row['mtime_ns'] != stat.st_mtime_ns:
+                counts['updated'] += 1
+            else:
+                if row['label'] != label:
+                    self.conn.execute('UPDATE images SET label = ? WHERE path = ?',
+                                      (label, path_key))
+                counts['unchanged'] += 1
+                continue
+            changed.append((entry.path, stat))
+
+        if workers is None:
+            workers = min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Unreadable files are logged and left unindexed
+            described = pool.map(_describe_or_skip, [path for path, _ in changed])
+            for (path, stat), info in zip(changed, described):
+                if info is None:
+                    path_key = self.key(path)
+                    seen.discard(path_key)
+                    counts['added' if path_key not in known else 'updated'] -= 1
+                    counts['skipped'] += 1
+                    continue
+                self.add(path, label, stat, *info)
+
+        removed = [(path_key,) for path_key in known if path_key not in seen]
+        self.conn.executemany('DELETE FROM images WHERE path = ?', removed)
+        counts['removed'] = len(removed)
+
+        self.conn.commit()
+        return counts
+
+    def add(self, path, label, stat, sha256, width=None, height=None, fmt=None):
+        """
+        Insert or update a single file whose hash is already known
+
+        Args:
+            path: Path to the file
+            label: Label to record
+            stat: os.stat_result for the file
+            sha256: Content hash
+            width, height, fmt: Image header information
+        """
+        path = os.path.abspath(path)
+        self.conn.execute(
+            """
+            INSERT INTO images (path, directory, label, size, mtime_ns,
+                                width, height, format, sha256)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                directory = excluded.directory,
+                label = excluded.label,
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                width = excluded.width,
+                height = excluded.height,
+                format = excluded.format,
+                feature_offset = CASE WHEN sha256 = excluded.sha256
+                                      THEN feature_offset ELSE NULL END,
+                split = CASE WHEN sha256 = excluded.sha256
+                             THEN split ELSE NULL END,
+                sha256 = excluded.sha256
+            """,
+            (self.key(path), self.key(os.path.dirname(path)), label,
+             stat.st_size, stat.st_mtime_ns, width, height, fmt, sha256)
+        )
+
+    def commit(self):
+        """Commit pending changes"""
+        self.conn.commit()
+
+    def files(self, label=None, directory=None):
+        """
+        List indexed files, ordered by path
+
+        Args:
+            label: Only return files with this label
+            directory: Only return files directly inside this directory
+
+        Returns:
+            list: sqlite3.Row records
+        """
+        query = 'SELECT * FROM images'
+        clauses, params = [], []
+        if label is not None:
+            clauses.append('label = ?')
+            params.append(label)
+        if directory is not None:
+            clauses.append('directory = ?')
+            params.append(self.key(Path(directory).resolve()))
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        return self.conn.execute(query + ' ORDER BY path', params).fetchall()
+
+    def find_hash(self, sha256, labels=None):
+        """
+        Look up files by content hash
+
+        Args:
+            sha256: Content hash
+            labels: Only return files with one of these labels
+
+        Returns:
+            list: sqlite3.Row records
+        """
+        rows = self.conn.execute(
+            'SELECT * FROM images WHERE sha256 = ? ORDER BY path', (sha256,)
+        ).fetchall()
+        if labels is not None:
+            rows = [row for row in rows if row['label'] in labels]
+        return rows
+
+    def class_counts(self):
+        """Return the number of indexed files per label (unlabeled files excluded)"""
+        return dict(self.conn.execute(
+            'SELECT label, COUNT(*) FROM images WHERE label IS NOT NULL '
+            'GROUP BY label ORDER BY label'
+        ).fetchall())
+
+    def feature_offsets(self):
+        """Return (path_key, offset) for every file with a cached feature row"""
+        return self.conn.execute(
+            'SELECT path, feature_offset FROM images WHERE feature_offset IS NOT NULL'
+        ).fetchall()
+
+    def set_feature_offsets(self, offsets):
+        """
+        Record cached-feature offsets
+
+        Args:
+            offsets: Iterable of (path_key, offset) pairs
+        """
+        self.conn.executemany(
+            'UPDATE images SET feature_offset = ? WHERE path = ?',
+            [(offset, path_key) for path_key, offset in offsets]
+        )
+        self.conn.commit()
+
+    def clear_feature_offsets(self):
+        """Forget all cached-feature offsets (e.g. after the cache was deleted)"""
+        self.conn.execute('UPDATE images SET feature_offset = NULL')
+        self.conn.commit()
+
+    def set_splits(self, splits):
+        """
+        Record a train/test split, replacing any previous one
+
+        Args:
+            splits: dict of 'train' or 'test' keyed by path key
+        """
+        self.conn.execute('UPDATE images SET split = NULL')
+        self.conn.executemany(
+            'UPDATE images SET split = ? WHERE path = ?',
+            [(split, path_key) for path_key, split in splits.items()]
+        )
+        self.conn.commit()
+
+    def split_counts(self):
+        """Return {label: {split: count}} for files with a recorded split"""
+        counts = {}
+        for label, split, count in self.conn.execute(
+            'SELECT label, split, COUNT(*) FROM images WHERE split IS NOT NULL '
+            'GROUP BY label, split ORDER BY label, split'
+        ):
+            counts.setdefault(label, {})[split] = count
+        return counts
+
+
+def open_index(data_dir=DATA_DIR):
+    """
+    Open the index stored in a data directory
+
+    Args:
+        data_dir: Data directory (default: project_root/Data)
+
+    Returns:
+        DatasetIndex: Index rooted at data_dir
+    """
+    data_dir = Path(data_dir)
+    return DatasetIndex(data_dir / INDEX_FILENAME, root=data_dir)
+
+
+def scan_dataset(index, data_dir=DATA_DIR, categories=CATEGORIES):
+    """
+    Update the index for every category folder in a data directory
+
+    Args:
+        index: DatasetIndex to update
+        data_dir: Data directory containing category folders
+        categories: Category folder names (also used as labels)
+
+    Returns:
+        dict: Scan counts per category (missing folders are omitted)
+    """
+    results = {}
+    for category in categories:
+        category_path = Path(data_dir) / category
+        if category_path.exists():
+            results[category] = index.scan(category_path, label=category)
+    return results
+
+
+def print_report(index):
+    """Print a class-balance report from the index"""
+    counts = index.class_counts()
+    total = sum(counts.values())
+
+    print("=" * 60)
+    print("Dataset Index Report")
+    print("=" * 60)
+    for label, count in counts.items():
+        share = count / total * 100 if total else 0
+        print(f"{label}: {count} images ({share:.1f}%)")
+    print(f"Total: {total} images")
+
+    split_counts = index.split_counts()
+    if split_counts:
+        print()
+        print("Recorded train/test split:")
+        for label, counts in split_counts.items():
+            print(f"{label}: {counts.get('train', 0)} train / {counts.get('test', 0)} test")
+
+    unreadable = index.conn.execute(
+        'SELECT COUNT(*) FROM images WHERE label IS NOT NULL AND width IS NULL'
+    ).fetchone()[0]
+    duplicates = index.conn.execute(
+        'SELECT COALESCE(SUM(n - 1), 0) FROM '
+        '(SELECT COUNT(*) AS n FROM images WHERE label IS NOT NULL GROUP BY sha256)'
+    ).fetchone()[0]
+    if unreadable:
+        print(f"WARNING: {unreadable} images with unreadable headers")
+    if duplicates:
+        print(f"WARNING: {duplicates} duplicate images (same content)")
+
+
+if __name__ == '__main__':
+    with open_index() as index:
+        for category, counts in scan_dataset(index).items():
+            print(f"{category}: +{counts['added']} ~{counts['updated']} "
+                  f"-{counts['removed']} ={counts['unchanged']}")
+        for extra_dir in sys.argv[1:]:
+            counts = index.scan(extra_dir)
+            print(f"{extra_dir}: +{counts['added']} ~{counts['updated']} "
+                  f"-{counts['removed']} ={counts['unchanged']}")
+        print()
+        print_report(index)
@@ -7,6 +7,8 @@ import os
 import shutil
 from pathlib import Path
 
+from dataset_index import CATEGORIES, open_index, scan_dataset, print_report
+
 # Configuration
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / 'Data'
@@ -30,18 +32,22 @@ def create_folder_structure():
     print(f"✅ Created: {NONORGANIC_DIR}")
     print()
 
-def list_test_images():
-    """List all test images"""
+def list_test_images(index):
+    """
+    List all test images via the dataset index
+    
+    Args:
+        index: DatasetIndex to update and query
+        
+    Returns:
+        list: Index rows for the test images, sorted by path
+    """
     if not TEST_IMAGES_DIR.exists():
         print(f"❌ Test images folder not found: {TEST_IMAGES_DIR}")
         return []
     
-    image_files = list(TEST_IMAGES_DIR.glob('*.jpg')) + \
-                  list(TEST_IMAGES_DIR.glob('*.png')) + \
-                  list(TEST_IMAGES_DIR.glob('*.jpeg')) + \
-                  list(TEST_IMAGES_DIR.glob('*.bmp'))
-    
-    return sorted(image_files)
+    index.scan(TEST_IMAGES_DIR)
+    return index.files(directory=TEST_IMAGES_DIR)
 
 def copy_image_to_category(source, destination_dir, filename):
     """Copy an image to a category folder"""
@@ -57,10 +63,14 @@ def interactive_organize():
     """Interactive mode to organize images"""
     create_folder_structure()
     
-    images = list_test_images()
+    index = open_index(DATA_DIR)
+    scan_dataset(index, DATA_DIR)
+    rows = list_test_images(index)
+    images = [index.resolve(row['path']) for row in rows]
     
     if not images:
         print("No images found in test images folder!")
+        index.close()
         return
     
     print(f"Found {len(images)} images to organize")
@@ -74,8 +84,12 @@ def interactive_organize():
     
     organized = {'organic': 0, 'nonorganic': 0, 'skipped': 0}
     
-    for i, image_path in enumerate(images, 1):
+    for i, (image_path, row) in enumerate(zip(images, rows), 1):
         print(f"\n[{i}/{len(images)}] Image: {image_path.name}")
+        if row['width'] is not None:
+            print(f"   {row['width']}x{row['height']} {row['format']}")
+        for existing in index.find_hash(row['sha256'], labels=CATEGORIES):
+            print(f"⚠️  Same image already in {existing['label']}: {index.resolve(existing['path']).name}")
         
         while True:
             choice = input("Category (o/n/s/q): ").strip().lower()
@@ -114,6 +128,11 @@ def interactive_organize():
     print(f"Total organized: {organized['organic'] + organized['nonorganic']} images")
     print()
     
+    scan_dataset(index, DATA_DIR)
+    print_report(index)
+    index.close()
+    print()
+    
     if organized['organic'] + organized['nonorganic'] > 0:
         print("✅ Data folder is ready for training!")
         print("Run: python backend/train_model.py")